@@ -14,18 +14,264 @@ Usage in notebook:
 
 import sys
 import os
+import stat
 import json
 import logging
 import threading
+import time
+import weakref
+from itertools import count
+from collections import Counter, deque
 from datetime import datetime
+from json.encoder import encode_basestring
 from pathlib import Path
-from queue import Queue
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 from IPython import get_ipython
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 LIVE_LOGS_FILE_PATH = "LIVE_LOGS_FILE_PATH"
 
+# Size of the reusable buffer the writer encodes batches into (msgspec only)
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Entries each ring can absorb beyond buffer_size during a burst; past that
+# the oldest overflow entries are dropped and counted
+OVERFLOW_BUFFER_SIZE = 256
+
+# Records a writer observes before specializing the stdlib json encoder for
+# the dominant record shape, and the share of them that shape must cover
+SPECIALIZE_AFTER_RECORDS = 500
+SPECIALIZE_MIN_SHARE = 0.5
+
+# Number of written batches between fdatasync calls
+SYNC_INTERVAL_BATCHES = 16
+
+# O_APPEND makes every write land atomically at the end of the file, even
+# when other threads or processes append to the same file
+LOG_FILE_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+# Most buffers a single writev() call accepts
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+# Compact UTF-8 layout, matching what orjson and msgspec produce
+_JSON_OPTIONS = {"default": str, "separators": (",", ":"), "ensure_ascii": False}
+
+
+def _json_dumps(entry: Dict[str, Any]) -> bytes:
+    """Serialize a log entry to a newline-terminated JSON line."""
+    # Lone surrogates become \udcxx escapes, which are valid inside JSON strings
+    return (json.dumps(entry, **_JSON_OPTIONS) + "\n").encode("utf-8", "backslashreplace")
+
+
+if orjson is not None:
+    # Datetimes and dataclasses go through default=str like they do with json
+    _ORJSON_OPTIONS = (
+        orjson.OPT_APPEND_NEWLINE
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def _dumps(entry: Dict[str, Any]) -> bytes:
+        """Serialize a log entry to a newline-terminated JSON line."""
+        try:
+            return orjson.dumps(entry, default=str, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # orjson rejects some values json accepts (e.g. integers over 64 bits)
+            return _json_dumps(entry)
+else:
+    _dumps = _json_dumps
+
+
+# Floats are excluded: encoders disagree on exponent and NaN formatting
+_PLAIN_SCALAR_TYPES = frozenset((str, int, bool, type(None)))
+
+
+def _is_plain(value: Any) -> bool:
+    """Whether value only contains JSON types that every encoder writes identically."""
+    value_type = type(value)
+    if value_type in _PLAIN_SCALAR_TYPES:
+        return True
+    if value_type is list:
+        return all(map(_is_plain, value))
+    if value_type is dict:
+        return all(type(key) is str and _is_plain(item) for key, item in value.items())
+    return False
+
+
+# With the _is_plain check on every value this path is slower than orjson
+# plus writev, so msgspec is only used in place of the stdlib encoder
+if msgspec is not None and orjson is None:
+    _msgspec_encoder = msgspec.json.Encoder()
+
+    def _encode_into(entry: Dict[str, Any], buf: bytearray, offset: int) -> int:
+        """Serialize a log entry as a JSON line into buf at offset, returning the new end."""
+        # msgspec natively encodes bytes, sets, datetimes, ... differently from
+        # default=str, so records holding anything else go through _dumps
+        for value in entry.values():
+            if type(value) not in _PLAIN_SCALAR_TYPES and not _is_plain(value):
+                break
+        else:
+            try:
+                # Encodes in place, truncating buf to the end of the record
+                _msgspec_encoder.encode_into(entry, buf, offset)
+            except (TypeError, ValueError, msgspec.EncodeError):
+                pass
+            else:
+                buf.append(0x0A)
+                return len(buf)
+        
+        line = _dumps(entry)
+        end = offset + len(line)
+        buf[offset:end] = line
+        return end
+else:
+    _encode_into = None
+
+
+def _json_value(value: Any) -> str:
+    """Serialize a single value the way _json_dumps would."""
+    return json.dumps(value, **_JSON_OPTIONS)
+
+
+def _compile_shape_encoder(keys: tuple, types: tuple):
+    """Generate an encoder for records with exactly these keys, in this order.
+    
+    Keys are pre-encoded into the source. Values of the types observed while
+    profiling (str, int) are encoded inline, behind an exact type check so a
+    record with a different value type still encodes correctly via _json_value.
+    The output is byte-identical to _json_dumps.
+    """
+    lines = ["def encode(e):"]
+    parts = []
+    for i, (key, value_type) in enumerate(zip(keys, types)):
+        lines.append(f"    v{i} = e[{key!r}]")
+        prefix = ("{" if i == 0 else ",") + _json_value(key) + ":"
+        if value_type is str:
+            value = f"(_str(v{i}) if type(v{i}) is str else _value(v{i}))"
+        elif value_type is int:
+            value = f"(_int(v{i}) if type(v{i}) is int else _value(v{i}))"
+        else:
+            value = f"_value(v{i})"
+        parts.append(f"{prefix!r} + {value}")
+    lines.append("    return (" + " + ".join(parts) + " + '}\\n').encode('utf-8', 'backslashreplace')")
+    
+    namespace = {"_str": encode_basestring, "_int": int.__repr__, "_value": _json_value}
+    exec("\n".join(lines), namespace)
+    return namespace["encode"]
+
+
+class _SpecializingEncoder:
+    """Stdlib json encoder that specializes itself for the dominant record shape.
+    
+    A session logs only a handful of key combinations. After observing the
+    first SPECIALIZE_AFTER_RECORDS records, the most common key sequence gets
+    a generated encoder (see _compile_shape_encoder); other shapes keep using
+    the generic encoder. Each writer thread owns its own instance.
+    """
+    
+    def __init__(self, generic):
+        self.generic = generic
+        self.shapes = Counter()
+        self.shape_types = {}
+        self.seen = 0
+        self.shape = None
+        self.fast = None
+    
+    def __call__(self, entry: Dict[str, Any]) -> bytes:
+        if self.fast is not None:
+            if tuple(entry) == self.shape:
+                return self.fast(entry)
+            return self.generic(entry)
+        
+        if self.shapes is not None:
+            self._observe(entry)
+        return self.generic(entry)
+    
+    def _observe(self, entry: Dict[str, Any]):
+        """Profile one record's shape, specializing once enough have been seen."""
+        shape = tuple(entry)
+        self.shapes[shape] += 1
+        if shape not in self.shape_types:
+            self.shape_types[shape] = tuple(map(type, entry.values()))
+        self.seen += 1
+        if self.seen < SPECIALIZE_AFTER_RECORDS:
+            return
+        
+        shape, hits = self.shapes.most_common(1)[0]
+        types = self.shape_types[shape]
+        self.shapes = self.shape_types = None
+        if hits < self.seen * SPECIALIZE_MIN_SHARE:
+            return
+        if not all(type(key) is str for key in shape):
+            # json.dumps coerces non-str keys; leave those to the generic path
+            return
+        
+        self.shape = shape
+        self.fast = _compile_shape_encoder(shape, types)
+
+
+def _format_timestamp(ts_ns: int) -> str:
+    """Format a time.time_ns() value as an ISO 8601 UTC timestamp."""
+    seconds, nanos = divmod(ts_ns, 1_000_000_000)
+    return datetime.utcfromtimestamp(seconds).replace(microsecond=nanos // 1000).isoformat() + "Z"
+
+
+def _write_all(fd: int, data: bytes):
+    """Write the whole buffer to fd, retrying on short writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+if hasattr(os, "writev"):
+    def _writev_all(fd: int, buffers: list):
+        """Write a list of buffers to fd with writev, retrying on short writes."""
+        i, n = 0, len(buffers)
+        while i < n:
+            written = os.writev(fd, buffers[i:i + _IOV_MAX])
+            # Skip fully written buffers and trim a partially written one
+            while i < n and written >= len(buffers[i]):
+                written -= len(buffers[i])
+                i += 1
+            if written:
+                buffers[i] = memoryview(buffers[i])[written:]
+else:
+    def _writev_all(fd: int, buffers: list):
+        """Write a list of buffers to fd, retrying on short writes."""
+        _write_all(fd, b"".join(buffers))
+
+
+def _close_fds(fds: list):
+    """Close every descriptor in fds, leaving the list empty."""
+    while fds:
+        os.close(fds.pop())
+
+
 class ThreadSafeStructuredLogger:
     """Thread-safe structured logger that captures all output from notebook cells."""
     
@@ -34,26 +280,84 @@ class ThreadSafeStructuredLogger:
         log_file: str = "notebook.log",
         buffer_size: int = 1000,
         include_cell_info: bool = True,
-        capture_print: bool = False
+        capture_print: bool = False,
+        compress: bool = False,
+        num_writers: Optional[int] = 1
     ):
         """
         Initialize the logger.
         
         Args:
             log_file: Path to log file
-            buffer_size: Size of the log queue buffer
+            buffer_size: Maximum number of pending log entries (bursts beyond it spill
+                into a small overflow buffer; lost entries are reported in a
+                "dropped" warning record)
             include_cell_info: Include cell execution context
             capture_print: Capture print statements
+            compress: Write zstd-compressed batches to "<log_file>.zst"
+                (requires the zstandard package; leave off for plain-text debugging)
+            num_writers: Number of writer threads appending to the log file
+                (None picks min(4, cpu_count))
         """
         self.log_file = Path(log_file)
+        self._requested_file = self.log_file
         self.include_cell_info = include_cell_info
         self.capture_print = capture_print
         
-        # Thread-safe queue for log entries
-        self.log_queue = Queue(maxsize=buffer_size)
+        if num_writers is None:
+            num_writers = min(4, os.cpu_count() or 1)
+        num_writers = max(1, num_writers)
+        
+        # One ring of pending log entries per writer; deque append/popleft are
+        # atomic, so producers never take a lock. Producers set the matching
+        # wake event so each writer sleeps while idle instead of polling.
+        self._ring_size = -(-buffer_size // num_writers)
+        self.log_rings = [deque() for _ in range(num_writers)]
+        self._wakes = [threading.Event() for _ in range(num_writers)]
+        
+        # Whether a wake-up is already pending for each writer; producers skip
+        # Event.set() while one is, and the writer resets it before draining
+        self._pending_wakes = [False] * num_writers
+        
+        # Bounded burst buffers used once a ring is full; they keep the most
+        # recent entries and count the ones they evict
+        self._overflows = [deque() for _ in range(num_writers)]
+        self._dropped = 0
+        self._drop_lock = threading.Lock()
+        
+        # Producer threads are assigned to rings round-robin on first use
+        self._next_shard = count()
+        
+        # Per-producer-thread template of the thread identity fields
+        self._tls = threading.local()
+        
+        # Set on threads whose stdout/stderr writes must not be logged again
+        # (writer threads, and print capture while it is logging)
+        self._print_guard = threading.local()
+        
         self.lock = threading.Lock()
         self.running = False
-        self.writer_thread = None
+        
+        # Writer threads keep draining until this is cleared by stop()
+        self._writing = False
+        self.writer_threads = []
+        
+        # One O_APPEND descriptor per writer, opened once and reused across
+        # start/stop cycles; closed by close(), or when the logger is collected
+        self._fds = []
+        weakref.finalize(self, _close_fds, self._fds)
+        
+        # Whether the log file is a regular file; fsync fails with EINVAL on
+        # devices and pipes such as /dev/null or a FIFO, so those are not synced
+        self._sync = False
+        
+        # Each written batch becomes an independent zstd frame, so the file
+        # stays decompressable as a stream
+        self.compress = compress
+        if compress:
+            if zstandard is None:
+                raise ImportError("compress=True requires the 'zstandard' package")
+            self.log_file = self.log_file.with_name(self.log_file.name + ".zst")
         
         # Cell tracking
         self.current_cell = None
@@ -68,6 +372,13 @@ class ThreadSafeStructuredLogger:
         
         # Setup Python logging handler
         self.log_handler = None
+        
+        # Active stdout/stderr captures, if capture_print is on
+        self._print_captures = []
+        
+        # Swapped for the active implementation by start(), so the hot path
+        # needs no running check
+        self._log = self._log_noop
     
     def start(self):
         """Start capturing logs."""
@@ -78,9 +389,23 @@ class ThreadSafeStructuredLogger:
             
             self.running = True
             
-            # Start background writer thread
-            self.writer_thread = threading.Thread(target=self._log_writer, daemon=True)
-            self.writer_thread.start()
+            if not self._fds:
+                self._fds.extend(
+                    os.open(self.log_file, LOG_FILE_FLAGS, 0o644)
+                    for _ in self.log_rings
+                )
+                self._sync = stat.S_ISREG(os.fstat(self._fds[0]).st_mode)
+            
+            self._log = self._make_log()
+            
+            # Start background writer threads
+            self._writing = True
+            self.writer_threads = [
+                threading.Thread(target=self._log_writer, args=(i,), daemon=True)
+                for i in range(len(self.log_rings))
+            ]
+            for thread in self.writer_threads:
+                thread.start()
             
             # Register IPython hooks
             # if self.ipython:
@@ -98,7 +423,6 @@ class ThreadSafeStructuredLogger:
             self._log({
                 "severity_text": "INFO",
                 "body": "Notebook logger started",
-				"timestamp": datetime.utcnow().isoformat() + "Z",
                 "log_file": str(self.log_file)
             })
             
@@ -110,15 +434,20 @@ class ThreadSafeStructuredLogger:
             if not self.running:
                 return
             
+            self.running = False
+            
+            # Log partial lines still buffered by the print capture, from any thread
+            for capture in self._print_captures:
+                capture.flush_all()
+            
             # Log shutdown
             self._log({
                 "severity_text": "INFO",
                 "body": "Notebook logger stopped",
                 "total_cells": self.cell_count,
-				"timestamp": datetime.utcnow().isoformat() + "Z"
             })
             
-            self.running = False
+            self._log = self._log_noop
             
             # Unregister hooks
             # if self.ipython:
@@ -133,19 +462,28 @@ class ThreadSafeStructuredLogger:
             if self.capture_print:
                 sys.stdout = self.original_stdout
                 sys.stderr = self.original_stderr
+                self._print_captures = []
             
-            # Wait for queue to empty
-            self.log_queue.join()
+            # Wake the writers and wait for them to drain the rings
+            self._writing = False
+            for wake in self._wakes:
+                wake.set()
+            for thread in self.writer_threads:
+                thread.join()
             
             print(f"Structured logging stopped")
     
+    def close(self):
+        """Stop capturing logs and release the log file."""
+        self.stop()
+        
+        for thread in self.writer_threads:
+            thread.join()
+        
+        _close_fds(self._fds)
+    
     def _setup_logging_handler(self):
         """Setup Python logging handler to capture logging.* calls."""
-
-        # Setup basic logging to stdout first
-        logging.basicConfig(
-            level=logging.INFO,
-        )
         
         class StructuredLogHandler(logging.Handler):
             def __init__(self, logger_instance):
@@ -160,7 +498,6 @@ class ThreadSafeStructuredLogger:
                     "module": record.module,
                     "function": record.funcName,
                     "line": record.lineno,
-					"timestamp": datetime.utcnow().isoformat() + "Z"
                 }
                 
                 if record.exc_info:
@@ -168,39 +505,93 @@ class ThreadSafeStructuredLogger:
                 
                 self.logger_instance._log(log_entry)
         
+        # Make sure INFO records reach the handler, without installing the stderr
+        # StreamHandler basicConfig() would add (its output would be captured
+        # again as print output)
+        root = logging.getLogger()
+        if root.getEffectiveLevel() > logging.INFO:
+            root.setLevel(logging.INFO)
+        
         self.log_handler = StructuredLogHandler(self)
-        logging.getLogger().addHandler(self.log_handler)
+        root.addHandler(self.log_handler)
     
     def _setup_print_capture(self):
         """Setup print statement capture."""
+        guard = self._print_guard
+        
         class PrintCapture:
             def __init__(self, original, logger_instance, stream_name):
                 self.original = original
                 self.logger_instance = logger_instance
                 self.stream_name = stream_name
+                
+                # Not yet terminated line of each writing thread and that
+                # thread's identity fields, keyed by thread ident, so stop()
+                # can drain every thread's leftovers under the right thread
+                self._pending = {}
+                self._pending_lock = threading.Lock()
             
             def write(self, text):
                 # Write to original
                 self.original.write(text)
                 self.original.flush()
                 
-                # Log if not empty
-                if text and text.strip():
-                    self.logger_instance._log({
-                        "severity_text": "ERROR" if self.stream_name == "stderr" else "INFO",
-                        "body": text.rstrip(),
-                        "source": "print",
-                        "stream": self.stream_name,
-						"timestamp": datetime.utcnow().isoformat() + "Z"
-                    })
+                # Coalesce partial writes, logging each line once it is complete
+                ident = threading.get_ident()
+                with self._pending_lock:
+                    buf, owner = self._pending.pop(ident, ("", None))
+                    lines = (buf + text).split("\n")
+                    rest = lines.pop()
+                    if rest:
+                        if owner is None:
+                            owner = {
+                                "thread_id": ident,
+                                "thread_name": threading.current_thread().name
+                            }
+                        self._pending[ident] = (rest, owner)
+                for line in lines:
+                    self._emit(line)
                 
                 return len(text)
             
             def flush(self):
                 self.original.flush()
+                
+                # Log any partial line left by this thread
+                with self._pending_lock:
+                    buf, _ = self._pending.pop(threading.get_ident(), ("", None))
+                if buf:
+                    self._emit(buf)
+            
+            def flush_all(self):
+                """Log the partial lines left by every thread, under that thread's identity."""
+                self.original.flush()
+                
+                with self._pending_lock:
+                    pending = list(self._pending.values())
+                    self._pending.clear()
+                for buf, owner in pending:
+                    self._emit(buf, owner)
+            
+            def _emit(self, text, thread_fields=None):
+                # Log if not empty, unless this write came from the logger itself
+                if text.strip() and not getattr(guard, "active", False):
+                    guard.active = True
+                    try:
+                        self.logger_instance._log({
+                            "severity_text": "ERROR" if self.stream_name == "stderr" else "INFO",
+                            "body": text.rstrip(),
+                            "source": "print",
+                            "stream": self.stream_name,
+                        }, thread_fields)
+                    finally:
+                        guard.active = False
         
-        sys.stdout = PrintCapture(self.original_stdout, self, "stdout")
-        sys.stderr = PrintCapture(self.original_stderr, self, "stderr")
+        self._print_captures = [
+            PrintCapture(self.original_stdout, self, "stdout"),
+            PrintCapture(self.original_stderr, self, "stderr")
+        ]
+        sys.stdout, sys.stderr = self._print_captures
     
     def _pre_run_cell(self, info):
         """Called before cell execution."""
@@ -217,7 +608,6 @@ class ThreadSafeStructuredLogger:
                 "body": f"Cell {self.cell_count} execution started",
                 "event": "cell_start",
                 "cell_preview": info.raw_cell[:100] if info.raw_cell else "",
-				"timestamp": datetime.utcnow().isoformat() + "Z"
             })
     
     def _post_run_cell(self, result):
@@ -228,7 +618,6 @@ class ThreadSafeStructuredLogger:
                 "body": f"Cell {self.cell_count} execution completed",
                 "event": "cell_end",
                 "success": result.success,
-				"timestamp": datetime.utcnow().isoformat() + "Z"
             }
             
             if result.error_in_exec:
@@ -238,46 +627,206 @@ class ThreadSafeStructuredLogger:
         
         self.current_cell = None
     
-    def _log(self, entry: Dict[str, Any]):
-        """Add log entry to queue."""
-        if not self.running:
-            return
+    def _log_noop(self, entry: Dict[str, Any], thread_fields: Optional[Dict[str, Any]] = None):
+        """Discard log entry (installed as _log while the logger is stopped)."""
+    
+    def _make_log(self):
+        """Build the active _log implementation, with hot-path lookups bound to locals."""
+        rings = self.log_rings
+        overflows = self._overflows
+        wakes = self._wakes
+        pending_wakes = self._pending_wakes
+        ring_size = self._ring_size
+        tls = self._tls
+        next_shard = self._next_shard
+        num_rings = len(rings)
+        time_ns = time.time_ns
         
-        # Add standard fields
-        entry["timestamp"] = datetime.utcnow().isoformat() + "Z"
-        entry["thread_id"] = threading.get_ident()
-        entry["thread_name"] = threading.current_thread().name
+        def _log(entry: Dict[str, Any], thread_fields: Optional[Dict[str, Any]] = None):
+            """Add log entry to the calling thread's ring.
+            
+            thread_fields, if given, replaces the calling thread's identity
+            fields (for entries logged on behalf of another thread).
+            """
+            # Add standard fields
+            entry["ts_ns"] = time_ns()
+            base = getattr(tls, "base", None)
+            if base is None:
+                base = tls.base = {
+                    "thread_id": threading.get_ident(),
+                    "thread_name": threading.current_thread().name
+                }
+                tls.shard = next(next_shard) % num_rings
+            entry.update(base)
+            if thread_fields is not None:
+                entry.update(thread_fields)
+            
+            # Add cell context if available
+            current_cell = self.current_cell
+            if current_cell and self.include_cell_info:
+                entry["cell_number"] = current_cell["cell_number"]
+                if current_cell.get("cell_id"):
+                    entry["cell_id"] = current_cell["cell_id"]
+            
+            # Add to this thread's ring (non-blocking), spilling into the
+            # overflow buffer when the ring is full
+            shard = tls.shard
+            ring = rings[shard]
+            if len(ring) < ring_size:
+                ring.append(entry)
+            else:
+                overflow = overflows[shard]
+                if len(overflow) >= OVERFLOW_BUFFER_SIZE:
+                    # Evict the oldest entry; the writer may have drained it first
+                    try:
+                        overflow.popleft()
+                    except IndexError:
+                        pass
+                    else:
+                        with self._drop_lock:
+                            self._dropped += 1
+                overflow.append(entry)
+            
+            # Racing with the writer is benign: worst case is one extra wake-up
+            if not pending_wakes[shard]:
+                pending_wakes[shard] = True
+                wakes[shard].set()
         
-        # Add cell context if available
-        if self.include_cell_info and self.current_cell:
-            entry["cell_number"] = self.current_cell["cell_number"]
-            if self.current_cell.get("cell_id"):
-                entry["cell_id"] = self.current_cell["cell_id"]
+        return _log
+    
+    def _log_writer(self, index: int):
+        """Background thread that writes one ring's logs to file."""
+        self._print_guard.active = True
+        
+        buf = bytearray(WRITE_BUFFER_SIZE) if _encode_into is not None else None
+        fd = self._fds[index]
+        ring = self.log_rings[index]
+        overflow = self._overflows[index]
+        wake = self._wakes[index]
+        cctx = zstandard.ZstdCompressor(level=3) if self.compress else None
+        # orjson is faster than any generated Python encoder; only the stdlib
+        # fallback benefits from specializing
+        dumps = _dumps if orjson is not None else _SpecializingEncoder(_dumps)
+        sync = self._sync
+        unsynced_batches = 0
         
-        # Add to queue (non-blocking)
+        while self._writing or ring or overflow or self._dropped:
+            # Sleep until a producer or stop() signals (timeout is only a safety net)
+            wake.wait(timeout=1.0)
+            wake.clear()
+            self._pending_wakes[index] = False
+            
+            # Drain everything currently in the ring, then the overflow buffer
+            batch = []
+            for pending in (ring, overflow):
+                popleft = pending.popleft
+                while True:
+                    try:
+                        batch.append(popleft())
+                    except IndexError:
+                        break
+            
+            records = len(batch)
+            
+            # Report entries lost since the last batch
+            dropped = 0
+            if self._dropped:
+                with self._drop_lock:
+                    dropped, self._dropped = self._dropped, 0
+                if dropped:
+                    batch.append(self._dropped_entry(dropped))
+            
+            if not batch:
+                continue
+            
+            for entry in batch:
+                entry["timestamp"] = _format_timestamp(entry.pop("ts_ns"))
+            
+            try:
+                if _encode_into is not None:
+                    # Encode straight into the reusable buffer, writing whenever it fills up
+                    offset = 0
+                    for entry in batch:
+                        try:
+                            offset = _encode_into(entry, buf, offset)
+                        except Exception as error:
+                            offset = _encode_into(self._unencodable_entry(entry, error), buf, offset)
+                        if offset >= WRITE_BUFFER_SIZE:
+                            self._write(fd, memoryview(buf)[:offset], cctx)
+                            offset = 0
+                            # Give back any capacity grown by an oversized record
+                            del buf[WRITE_BUFFER_SIZE:]
+                    
+                    if offset:
+                        self._write(fd, memoryview(buf)[:offset], cctx)
+                else:
+                    lines = []
+                    for entry in batch:
+                        try:
+                            lines.append(dumps(entry))
+                        except Exception as error:
+                            lines.append(dumps(self._unencodable_entry(entry, error)))
+                    if cctx is not None:
+                        self._write(fd, b"".join(lines), cctx)
+                    else:
+                        # Hand the kernel the records as a scatter-gather list
+                        # rather than copying them into one buffer first
+                        _writev_all(fd, lines)
+            except OSError:
+                # Keep the writer alive and report the batch as dropped with
+                # the next one; once stopping, give up rather than retry forever
+                if self._writing:
+                    with self._drop_lock:
+                        self._dropped += records + dropped
+                continue
+            
+            # Bound how much the OS may hold unsynced without syncing every batch
+            unsynced_batches += 1
+            if sync and unsynced_batches >= SYNC_INTERVAL_BATCHES:
+                _fdatasync(fd)
+                unsynced_batches = 0
+        
+        if sync:
+            os.fsync(fd)
+    
+    def _dropped_entry(self, dropped: int) -> Dict[str, Any]:
+        """Build the warning record reporting entries lost to a full buffer."""
+        return {
+            "severity_text": "WARNING",
+            "body": f"dropped {dropped} log records",
+            "dropped": dropped,
+            "ts_ns": time.time_ns(),
+            "thread_id": threading.get_ident(),
+            "thread_name": threading.current_thread().name
+        }
+    
+    def _unencodable_entry(self, entry: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Build the error record written in place of an entry that failed to serialize."""
+        # Encoding can fail on circular references or on values whose
+        # __str__ raises; repr() of either may fail too
+        try:
+            record = repr(entry)
+        except Exception:
+            record = object.__repr__(entry)
         try:
-            self.log_queue.put_nowait(entry)
-        except:
-            # Queue full, skip this entry
-            pass
+            error = repr(error)
+        except Exception:
+            error = type(error).__name__
+        return {
+            "severity_text": "ERROR",
+            "body": "log record could not be serialized",
+            "error": error,
+            "record": record,
+            "timestamp": entry.get("timestamp"),
+            "thread_id": entry.get("thread_id"),
+            "thread_name": entry.get("thread_name")
+        }
     
-    def _log_writer(self):
-        """Background thread that writes logs to file."""
-        with open(self.log_file, 'a') as f:
-            while self.running or not self.log_queue.empty():
-                try:
-                    # Get log entry from queue (with timeout)
-                    entry = self.log_queue.get(timeout=0.1)
-                    
-                    # Format and write
-                    line = json.dumps(entry, default=str)
-                    
-                    f.write(line + "\n")
-                    f.flush()
-                    
-                    self.log_queue.task_done()
-                except:
-                    continue
+    def _write(self, fd: int, data, cctx=None):
+        """Write a serialized chunk, compressing it first if a compressor is given."""
+        if cctx is not None:
+            data = cctx.compress(data)
+        _write_all(fd, data)
     
     def log(self, level: str, message: str, **kwargs):
         """Manually log a structured message."""
@@ -289,19 +838,60 @@ class ThreadSafeStructuredLogger:
         self._log(entry)
 
 
+class _TargetedLogger:
+    """View of the shared logger for a caller that asked for a different file.
+    
+    Records logged through its log() are tagged with the requested path as
+    target_file; every other attribute, read or set, is the shared logger's.
+    """
+    
+    def __init__(self, logger: ThreadSafeStructuredLogger, target_file: str):
+        object.__setattr__(self, "_logger", logger)
+        object.__setattr__(self, "target_file", target_file)
+    
+    def log(self, level: str, message: str, **kwargs):
+        """Manually log a structured message, tagged with the requested file."""
+        kwargs.setdefault("target_file", self.target_file)
+        self._logger.log(level, message, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._logger, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._logger, name, value)
+
+
+def _for_target(
+    logger: ThreadSafeStructuredLogger, log_file: Optional[str]
+) -> Union[ThreadSafeStructuredLogger, _TargetedLogger]:
+    """Return logger, wrapped to tag records when log_file differs from its file."""
+    if log_file is None or Path(log_file) == logger._requested_file:
+        return logger
+    return _TargetedLogger(logger, str(log_file))
+
+
 # Singleton instance
 _logger_instance: Optional[ThreadSafeStructuredLogger] = None
 
 
-def get_logger(log_file: str = "notebook.log", **kwargs) -> ThreadSafeStructuredLogger:
-    """Get or create the global logger instance."""
+def get_logger(
+    log_file: Optional[str] = None, **kwargs
+) -> Union[ThreadSafeStructuredLogger, _TargetedLogger]:
+    """
+    Get or create the global logger instance.
+    
+    All callers share one writer and one file. A caller asking for a different
+    file gets a view whose log() records carry that path as target_file.
+    """
     global _logger_instance
     if _logger_instance is None:
-        _logger_instance = ThreadSafeStructuredLogger(log_file, **kwargs)
-    return _logger_instance
+        _logger_instance = ThreadSafeStructuredLogger(log_file or "notebook.log", **kwargs)
+    return _for_target(_logger_instance, log_file)
 
 
-def start_logging(log_file: str = "notebook.log", **kwargs):
+def start_logging(
+    log_file: Optional[str] = None, **kwargs
+) -> Optional[Union[ThreadSafeStructuredLogger, _TargetedLogger]]:
     """Quick start function."""
 
     json_file_path = os.getenv(LIVE_LOGS_FILE_PATH, "")
@@ -311,4 +901,4 @@ def start_logging(log_file: str = "notebook.log", **kwargs):
 
     logger = get_logger(json_file_path, **kwargs)
     logger.start()
-    return logger
+    return _for_target(logger, log_file)
@@ -0,0 +1,236 @@
+"""
+Tests for the log writer internals of live_logs_handler.
+
+Run with pytest or directly.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from unittest import mock
+from live_logs_handler import ThreadSafeStructuredLogger
+from live_logs_handler import handler
+
+
+def read_records(path):
+    """Read all JSON records from a log file."""
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_dropped_records_are_accounted():
+    """Every produced record is either written or counted as dropped."""
+    num_threads = 4
+    iterations = 3000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drops.log")
+        logger = ThreadSafeStructuredLogger(path, buffer_size=8, num_writers=2)
+        logger.start()
+
+        def produce(worker_id):
+            for i in range(iterations):
+                logger.log("info", f"Producer {worker_id} - record #{i}")
+
+        threads = [
+            threading.Thread(target=produce, args=(i,))
+            for i in range(num_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        logger.close()
+        records = read_records(path)
+
+    dropped = [r for r in records if "dropped" in r]
+    written = len(records) - len(dropped)
+    lost = sum(r["dropped"] for r in dropped)
+
+    # Producer records plus the "started" and "stopped" records
+    assert written + lost == num_threads * iterations + 2
+
+
+def test_print_capture_logs_one_record_per_line():
+    """Captured output is split into lines; leftovers keep their thread's identity."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "print.log")
+        logger = ThreadSafeStructuredLogger(path, capture_print=True)
+        logger.start()
+        try:
+            sys.stdout.write("par")
+            sys.stdout.write("tial\n")
+            sys.stderr.write("err1\nerr2\n")
+            worker = threading.Thread(
+                target=lambda: sys.stdout.write("left over"), name="print-worker"
+            )
+            worker.start()
+            worker.join()
+        finally:
+            logger.close()
+        records = read_records(path)
+
+    printed = [r for r in records if r.get("source") == "print"]
+    bodies = [(r["stream"], r["body"]) for r in printed]
+    assert ("stdout", "partial") in bodies
+    assert ("stderr", "err1") in bodies
+    assert ("stderr", "err2") in bodies
+    assert ("stdout", "left over") in bodies
+    assert ("stdout", "par") not in bodies
+
+    leftover = next(r for r in printed if r["body"] == "left over")
+    assert leftover["thread_name"] == "print-worker"
+
+
+def test_unserializable_record_does_not_stop_the_writer():
+    """A record that fails to encode is replaced by an error record."""
+
+    class BadStr:
+        def __str__(self):
+            raise RuntimeError("no str")
+
+    circular = {}
+    circular["self"] = circular
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bad.log")
+        logger = ThreadSafeStructuredLogger(path)
+        logger.start()
+        logger.log("info", "circular", data=circular)
+        logger.log("info", "bad str", data=BadStr())
+        logger.log("info", "after")
+        logger.close()
+        records = read_records(path)
+
+    bodies = [r["body"] for r in records]
+    assert bodies[0] == "Notebook logger started"
+    assert bodies[-2:] == ["after", "Notebook logger stopped"]
+    errors = [r for r in records if r["severity_text"] == "ERROR"]
+    assert len(errors) == 2
+    assert all(r["body"] == "log record could not be serialized" for r in errors)
+
+
+def test_non_regular_log_file_is_not_synced():
+    """Logging to a device such as os.devnull does not kill the writer."""
+    with mock.patch.object(handler, "SYNC_INTERVAL_BATCHES", 1):
+        logger = ThreadSafeStructuredLogger(os.devnull)
+        logger.start()
+        for i in range(20):
+            logger.log("info", f"record #{i}")
+            time.sleep(0.001)
+        alive = all(thread.is_alive() for thread in logger.writer_threads)
+        logger.close()
+
+    assert alive
+
+
+def test_targeted_logger_tags_only_its_records():
+    """A get_logger() view for another file tags its records and shares settings."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shared.log")
+        other = os.path.join(tmp, "other.log")
+        with mock.patch.object(handler, "_logger_instance", None):
+            logger = handler.get_logger(path)
+            view = handler.get_logger(other)
+            assert view is not logger
+            assert handler.get_logger(path) is logger
+
+            view.include_cell_info = False
+            assert logger.include_cell_info is False
+
+            logger.start()
+            view.log("info", "from view")
+            logger.log("info", "from shared")
+            logger.close()
+        records = {r["body"]: r for r in read_records(path)}
+
+    assert records["from view"]["target_file"] == other
+    assert "target_file" not in records["from shared"]
+    assert not os.path.exists(other)
+
+
+def test_specialized_encoder_matches_json_dumps():
+    """The specialized encoder emits exactly the bytes _json_dumps would."""
+    rng = random.Random(0)
+    values = [
+        "plain", "", "caf\u00e9 \u65e5\u672c", "quote \" back \\ slash", "tab\tnew\nline",
+        "\x00\x1f\u2028", "\ud800 lone surrogate", 0, -1, 2 ** 70, True, False,
+        None, 1.5, float("nan"), [1, "a", None], {"k": [True]},
+        datetime(2024, 1, 2, 3, 4, 5), date(2024, 1, 2), b"bytes", {1, 2},
+    ]
+
+    def record(keys):
+        return {key: rng.choice(values) for key in keys}
+
+    encoder = handler._SpecializingEncoder(handler._json_dumps)
+    shape = ("timestamp", "level", "message", "thread")
+    for i in range(handler.SPECIALIZE_AFTER_RECORDS):
+        entry = {"timestamp": "2024-01-02T03:04:05", "level": "INFO",
+                 "message": f"record #{i}", "thread": i}
+        assert encoder(entry) == handler._json_dumps(entry)
+    assert encoder.fast is not None
+
+    shapes = [shape, shape + ("extra",), shape[:2], ("level", "timestamp", "message", "thread")]
+    for _ in range(5000):
+        entry = record(rng.choice(shapes))
+        assert encoder(entry) == handler._json_dumps(entry), entry
+
+
+def test_writev_all_resumes_short_writes():
+    """_writev_all writes every byte in order despite short writes and IOV_MAX chunking."""
+    if not hasattr(os, "writev"):
+        return
+
+    rng = random.Random(0)
+    real_write = os.write
+
+    def short_writev(fd, buffers):
+        # At most three buffers per call, and often only part of them
+        assert len(buffers) <= 3
+        data = b"".join(bytes(b) for b in buffers)
+        return real_write(fd, data[:rng.randint(1, len(data))] if data else b"")
+
+    buffers = [b"abc", b"", b"defgh", b"i", b"jklmnop", b"", b"q\n"] * 50
+    expected = b"".join(buffers)
+
+    read_fd, write_fd = os.pipe()
+    try:
+        with mock.patch.object(handler.os, "writev", short_writev), \
+                mock.patch.object(handler, "_IOV_MAX", 3):
+            handler._writev_all(write_fd, list(buffers))
+        os.close(write_fd)
+        write_fd = None
+
+        written = b""
+        while True:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            written += chunk
+    finally:
+        os.close(read_fd)
+        if write_fd is not None:
+            os.close(write_fd)
+
+    assert written == expected
+
+
+def main():
+    """Run all tests."""
+    test_dropped_records_are_accounted()
+    test_print_capture_logs_one_record_per_line()
+    test_unserializable_record_does_not_stop_the_writer()
+    test_non_regular_log_file_is_not_synced()
+    test_targeted_logger_tags_only_its_records()
+    test_specialized_encoder_matches_json_dumps()
+    test_writev_all_resumes_short_writes()
+
+
+if __name__ == "__main__":
+    main()